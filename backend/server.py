@@ -191,6 +191,13 @@ async def get_configurations():
     configurations = await db.configurations.find().to_list(1000)
     return [SerialConfiguration(**config) for config in configurations]
 
+@api_router.get("/configuration/{configuration_id}", response_model=SerialConfiguration)
+async def get_configuration(configuration_id: str):
+    config = await db.configurations.find_one({"id": configuration_id})
+    if not config:
+        raise HTTPException(status_code=404, detail="Configuration not found")
+    return SerialConfiguration(**config)
+
 @api_router.post("/serial-numbers", response_model=SerialNumbers)
 async def create_serial_numbers(input: SerialNumbersCreate):
     # Validate configuration exists
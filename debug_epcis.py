@@ -5,10 +5,34 @@ Debug EPCIS XML Generation to understand the structure
 
 import requests
 import json
+import sys
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 BACKEND_URL = "https://c8e3fe45-251a-4359-a250-c028fb05fe98.preview.emergentagent.com/api"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+BUSINESS_IDENTIFIERS = frozenset(sys.intern(identifier) for identifier in (
+    "0345802000014", "0345802000014.001",
+    "0567890000021", "0567890000021.001",
+    "0999888000028", "0999888000028.001"
+))
+
+def post_json(session, url, payload, **kwargs):
+    """POST a compactly encoded JSON body"""
+    return session.post(url, data=json.dumps(payload, separators=(",", ":")), headers=JSON_HEADERS, **kwargs)
+
+def collect_identifiers(root):
+    """Collect the GLN/SGLN tails of every URN or identifier value in the document"""
+    found = set()
+    for elem in root.iter():
+        for value in (elem.text, *elem.attrib.values()):
+            if value:
+                tail = value.strip().rpartition(":")[2]
+                found.add(tail)
+                found.add(tail.partition(".")[0])
+    return found
 
 def debug_epcis_xml():
     session = requests.Session()
@@ -43,17 +67,13 @@ def debug_epcis_xml():
     }
     
     # Create configuration
-    config_response = session.post(
-        f"{BACKEND_URL}/configuration",
-        json=test_data,
-        headers={"Content-Type": "application/json"}
-    )
+    config_response = post_json(session, f"{BACKEND_URL}/configuration", test_data)
     
     if config_response.status_code != 200:
         print(f"Failed to create configuration: {config_response.status_code}")
         return
     
-    config_id = config_response.json()["id"]
+    config_id = json.loads(config_response.content)["id"]
     print(f"Created configuration: {config_id}")
     
     # Create serial numbers
@@ -65,11 +85,7 @@ def debug_epcis_xml():
         "item_serial_numbers": ["I001", "I002", "I003", "I004", "I005", "I006"]
     }
     
-    serial_response = session.post(
-        f"{BACKEND_URL}/serial-numbers",
-        json=serial_data,
-        headers={"Content-Type": "application/json"}
-    )
+    serial_response = post_json(session, f"{BACKEND_URL}/serial-numbers", serial_data)
     
     if serial_response.status_code != 200:
         print(f"Failed to create serial numbers: {serial_response.status_code}")
@@ -84,14 +100,27 @@ def debug_epcis_xml():
         "biz_location": "urn:epc:id:sgln:1234567.00001.0"
     }
     
-    epcis_response = session.post(
-        f"{BACKEND_URL}/generate-epcis",
-        json=epcis_data,
-        headers={"Content-Type": "application/json"}
-    )
+    # The stored serial numbers don't depend on EPCIS generation, so fetch
+    # them while the server builds the XML instead of after it
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        epcis_future = executor.submit(post_json, session, f"{BACKEND_URL}/generate-epcis", epcis_data, stream=True)
+        stored_future = executor.submit(session.get, f"{BACKEND_URL}/serial-numbers/{config_id}")
+        epcis_response = epcis_future.result()
+        stored_response = stored_future.result()
     
-    if epcis_response.status_code != 200:
-        print(f"Failed to generate EPCIS: {epcis_response.status_code}")
+    if stored_response.status_code == 200:
+        stored = json.loads(stored_response.content)
+        print(f"Stored serial numbers: {len(stored['sscc_serial_numbers'])} SSCC, "
+              f"{len(stored['case_serial_numbers'])} cases, {len(stored['item_serial_numbers'])} items")
+    else:
+        print(f"Failed to fetch stored serial numbers: {stored_response.status_code}")
+    
+    # Drop the connection without downloading the body of a failed generation
+    try:
+        epcis_response.raise_for_status()
+    except requests.HTTPError as e:
+        epcis_response.close()
+        print(f"Failed to generate EPCIS: {e}")
         return
     
     xml_content = epcis_response.text
@@ -131,14 +160,10 @@ def debug_epcis_xml():
         
         # Check for business entity identifiers
         print(f"\nBusiness Entity Identifiers in XML:")
-        business_identifiers = [
-            "0345802000014", "0345802000014.001",
-            "0567890000021", "0567890000021.001", 
-            "0999888000028", "0999888000028.001"
-        ]
+        found_identifiers = collect_identifiers(root) & BUSINESS_IDENTIFIERS
         
-        for identifier in business_identifiers:
-            if identifier in xml_content:
+        for identifier in sorted(BUSINESS_IDENTIFIERS):
+            if identifier in found_identifiers:
                 print(f"  ✓ Found: {identifier}")
             else:
                 print(f"  ✗ Missing: {identifier}")
@@ -11,9 +11,15 @@ from datetime import datetime
 
 # Get backend URL from environment
 BACKEND_URL = "https://c8e3fe45-251a-4359-a250-c028fb05fe98.preview.emergentagent.com/api"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def post_json(session, url, payload, **kwargs):
+    """POST a compactly encoded JSON body"""
+    return session.post(url, data=json.dumps(payload, separators=(",", ":")), headers=JSON_HEADERS, **kwargs)
 
 def debug_epcis_generation():
     """Debug the EPCIS generation to understand the XML structure"""
+    session = requests.Session()
     
     # First create a simple configuration
     config_data = {
@@ -29,12 +35,12 @@ def debug_epcis_generation():
     }
     
     print("Creating configuration...")
-    response = requests.post(f"{BACKEND_URL}/configuration", json=config_data)
+    response = post_json(session, f"{BACKEND_URL}/configuration", config_data)
     if response.status_code != 200:
         print(f"Failed to create configuration: {response.status_code} - {response.text}")
         return
     
-    config = response.json()
+    config = json.loads(response.content)
     config_id = config["id"]
     print(f"Configuration created with ID: {config_id}")
     
@@ -42,12 +48,12 @@ def debug_epcis_generation():
     serial_data = {
         "configuration_id": config_id,
         "sscc_serial_numbers": ["SSCC001"],
-        "case_serial_numbers": [f"CASE{i+1:03d}" for i in range(5)],
-        "item_serial_numbers": [f"ITEM{i+1:03d}" for i in range(50)]
+        "case_serial_numbers": list(map("CASE{:03d}".format, range(1, 6))),
+        "item_serial_numbers": list(map("ITEM{:03d}".format, range(1, 51)))
     }
     
     print("Creating serial numbers...")
-    response = requests.post(f"{BACKEND_URL}/serial-numbers", json=serial_data)
+    response = post_json(session, f"{BACKEND_URL}/serial-numbers", serial_data)
     if response.status_code != 200:
         print(f"Failed to create serial numbers: {response.status_code} - {response.text}")
         return
@@ -62,9 +68,13 @@ def debug_epcis_generation():
     }
     
     print("Generating EPCIS XML...")
-    response = requests.post(f"{BACKEND_URL}/generate-epcis", json=epcis_data)
-    if response.status_code != 200:
-        print(f"Failed to generate EPCIS: {response.status_code} - {response.text}")
+    response = post_json(session, f"{BACKEND_URL}/generate-epcis", epcis_data, stream=True)
+    # Drop the connection without downloading the body of a failed generation
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        response.close()
+        print(f"Failed to generate EPCIS: {e}")
         return
     
     xml_content = response.text
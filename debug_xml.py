@@ -4,25 +4,39 @@ Debug XML generation to check for duplicate attribute issue
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import io
+import sys
+from contextlib import redirect_stdout
+from itertools import islice
 
 BACKEND_URL = "https://c8e3fe45-251a-4359-a250-c028fb05fe98.preview.emergentagent.com/api"
 
+# One keep-alive pool shared by every request to the backend
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Use the configuration ID from the previous test
+CONFIG_ID = "1c2d05e6-c124-4412-97c8-f79cd494cf01"  # From first test scenario
+
+# The request body never changes, so encode it once
+EPCIS_REQUEST_BODY = json.dumps({
+    "configurationId": CONFIG_ID,
+    "readPoint": "urn:epc:id:sgln:1234567.00000.0",
+    "bizLocation": "urn:epc:id:sgln:1234567.00001.0"
+}, separators=(",", ":")).encode()
+
 def debug_xml_generation():
-    # Use the configuration ID from the previous test
-    config_id = "1c2d05e6-c124-4412-97c8-f79cd494cf01"  # From first test scenario
-    
-    test_data = {
-        "configurationId": config_id,
-        "readPoint": "urn:epc:id:sgln:1234567.00000.0",
-        "bizLocation": "urn:epc:id:sgln:1234567.00001.0"
-    }
-    
     try:
-        response = requests.post(
+        # Streamed so only the preview lines are ever read off the socket
+        response = SESSION.post(
             f"{BACKEND_URL}/generate-epcis",
-            json=test_data,
-            headers={"Content-Type": "application/json"}
+            data=EPCIS_REQUEST_BODY,
+            headers={"Content-Type": "application/json"},
+            stream=True
         )
         
         print(f"Status Code: {response.status_code}")
@@ -30,12 +44,11 @@ def debug_xml_generation():
         print(f"Content-Disposition: {response.headers.get('Content-Disposition')}")
         
         if response.status_code == 200:
-            xml_content = response.text
-            
             # Show first few lines to identify duplicate attribute
-            lines = xml_content.split('\n')
+            lines = [line.decode() for line in islice(response.iter_lines(), 5)]
+            response.close()
             print("\nFirst 5 lines of XML:")
-            for i, line in enumerate(lines[:5], 1):
+            for i, line in enumerate(lines, 1):
                 print(f"Line {i}: {line}")
                 
             # Check line 2 specifically (where error occurs)
@@ -52,4 +65,10 @@ def debug_xml_generation():
         print(f"Request error: {str(e)}")
 
 if __name__ == "__main__":
-    debug_xml_generation()
\ No newline at end of file
+    # Collect the report and write it once rather than a syscall per line
+    report = io.StringIO()
+    try:
+        with redirect_stdout(report):
+            debug_xml_generation()
+    finally:
+        sys.stdout.write(report.getvalue())
\ No newline at end of file
@@ -4,160 +4,251 @@ Debug XML Generation Step by Step
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import io
+import re
+import sys
+from contextlib import redirect_stdout
+from functools import lru_cache
 import xml.etree.ElementTree as ET
 
 # Get backend URL from environment
 BACKEND_URL = "https://c8e3fe45-251a-4359-a250-c028fb05fe98.preview.emergentagent.com/api"
 
-def debug_xml_step_by_step():
-    session = requests.Session()
+# One keep-alive pool shared by every request to the backend
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def post_json(session, url, payload, **kwargs):
+    """POST a compactly encoded JSON body"""
+    return session.post(url, data=json.dumps(payload, separators=(",", ":")), headers=JSON_HEADERS, **kwargs)
+
+TEST_CONFIG = {
+    "items_per_case": 3,
+    "cases_per_sscc": 2,
+    "number_of_sscc": 1,
+    "use_inner_cases": False,
+    "company_prefix": "1234567",
+    "item_product_code": "000000",
+    "case_product_code": "000001",
+    "lot_number": "LOT123",
+    "expiration_date": "2025-12-31",
+    "sscc_indicator_digit": "3",
+    "case_indicator_digit": "2",
+    "item_indicator_digit": "1",
+    "sender_company_prefix": "0345802",
+    "sender_gln": "0345802000014",
+    "sender_sgln": "0345802000014.001",
+    "receiver_company_prefix": "0567890",
+    "receiver_gln": "0567890000021",
+    "receiver_sgln": "0567890000021.001",
+    "shipper_company_prefix": "0999888",
+    "shipper_gln": "0999888000028",
+    "shipper_sgln": "0999888000028.001",
+    "shipper_same_as_sender": False,
+    "package_ndc": "45802-046-85",
+    "regulated_product_name": "Test Product",
+    "manufacturer_name": "Test Manufacturer"
+}
+
+# The configuration body never changes, so encode it once
+TEST_CONFIG_BODY = json.dumps(TEST_CONFIG, separators=(",", ":")).encode()
+
+TEST_SERIALS = {
+    "sscc_serial_numbers": ["SSCC001"],
+    "case_serial_numbers": ["CASE001", "CASE002"],
+    "inner_case_serial_numbers": [],
+    "item_serial_numbers": ["ITEM001", "ITEM002", "ITEM003", "ITEM004", "ITEM005", "ITEM006"]
+}
+
+TEST_EPCIS_REQUEST = {
+    "read_point": "urn:epc:id:sgln:1234567.00000.0",
+    "biz_location": "urn:epc:id:sgln:1234567.00001.0"
+}
+
+# Paths below EPCISHeader; {*} matches any namespace, as the generator has
+# used both the EPCIS and the SBDH default namespace for these elements
+MASTER_DATA_PATH = "{*}extension/{*}EPCISMasterData"
+VOCABULARY_LIST_PATH = MASTER_DATA_PATH + "/{*}VocabularyList"
+
+# ObjectEvent children reported verbatim as "name: text"
+EVENT_TEXT_FIELDS = frozenset({"bizStep", "action", "disposition"})
+
+# Raw byte patterns reported in the summary, keyed by their report label
+RAW_PATTERNS = {
+    "'Location' vocabulary": b"urn:epcglobal:epcis:vtype:Location",
+    "shipping bizStep": b"urn:epcglobal:cbv:bizstep:shipping",
+    "sender GLN": b"0345802000014",
+    "receiver GLN": b"0567890000021",
+    "shipper GLN": b"0999888000028",
+}
+RAW_PATTERNS_RE = re.compile(b"|".join(map(re.escape, RAW_PATTERNS.values())))
+# Bytes carried between reads so a pattern split across two chunks still matches
+RAW_PATTERNS_OVERLAP = max(map(len, RAW_PATTERNS.values())) - 1
+
+class PatternScanningReader:
+    """File-like wrapper that records the RAW_PATTERNS in the bytes read through it"""
     
-    # Create test configuration
-    test_data = {
-        "items_per_case": 3,
-        "cases_per_sscc": 2,
-        "number_of_sscc": 1,
-        "use_inner_cases": False,
-        "company_prefix": "1234567",
-        "item_product_code": "000000",
-        "case_product_code": "000001",
-        "lot_number": "LOT123",
-        "expiration_date": "2025-12-31",
-        "sscc_indicator_digit": "3",
-        "case_indicator_digit": "2",
-        "item_indicator_digit": "1",
-        "sender_company_prefix": "0345802",
-        "sender_gln": "0345802000014",
-        "sender_sgln": "0345802000014.001",
-        "receiver_company_prefix": "0567890",
-        "receiver_gln": "0567890000021",
-        "receiver_sgln": "0567890000021.001",
-        "shipper_company_prefix": "0999888",
-        "shipper_gln": "0999888000028",
-        "shipper_sgln": "0999888000028.001",
-        "shipper_same_as_sender": False,
-        "package_ndc": "45802-046-85",
-        "regulated_product_name": "Test Product",
-        "manufacturer_name": "Test Manufacturer"
-    }
+    def __init__(self, raw):
+        self._raw = raw
+        self._tail = b""
+        self.found = set()
     
-    # Create configuration
-    response = session.post(f"{BACKEND_URL}/configuration", json=test_data, headers={"Content-Type": "application/json"})
-    config_id = response.json()["id"]
+    def read(self, size=-1):
+        chunk = self._raw.read(size)
+        if chunk and len(self.found) < len(RAW_PATTERNS):
+            window = self._tail + chunk
+            self.found.update(match.group() for match in RAW_PATTERNS_RE.finditer(window))
+            self._tail = window[-RAW_PATTERNS_OVERLAP:]
+        return chunk
+
+@lru_cache(maxsize=64)
+def localname(tag):
+    """Strip the namespace from an element tag (documents reuse a handful of tags).
+
+    The result is interned so comparisons against the tag-name literals in
+    this module hit the identity fast path of ==.
+    """
+    return sys.intern(tag.rpartition("}")[2])
+
+def report_epcis_header(header):
+    """Print the EPCISHeader master-data structure"""
+    print("✓ EPCISHeader found")
+    if header.find("{*}extension") is not None:
+        print("  ✓ extension found")
+    if header.find(MASTER_DATA_PATH) is not None:
+        print("    ✓ EPCISMasterData found")
+    for vocabulary_list in header.iterfind(VOCABULARY_LIST_PATH):
+        print("      ✓ VocabularyList found")
+        vocab_count = 0
+        for vocab in vocabulary_list.iterfind("{*}Vocabulary"):
+            vocab_count += 1
+            vocab_type = vocab.get("type")
+            print(f"        ✓ Vocabulary {vocab_count}: {vocab_type}")
+            
+            # Count elements in each vocabulary
+            for element_list in vocab.iterfind("{*}VocabularyElementList"):
+                element_count = 0
+                for vocab_element in element_list.iterfind("{*}VocabularyElement"):
+                    element_count += 1
+                    elem_id = vocab_element.get("id")
+                    print(f"          - Element {element_count}: {elem_id}")
+                print(f"          Total elements: {element_count}")
+        print(f"      Total vocabularies: {vocab_count}")
+
+def summarize_event(event):
+    """Reduce a finished event to (event_type, is_object_event, detail lines, bizSteps)"""
+    event_type = localname(event.tag)
+    is_object_event = event_type == "ObjectEvent"
+    lines = []
+    biz_steps = []
     
-    # Create serial numbers
-    serial_data = {
-        "configuration_id": config_id,
-        "sscc_serial_numbers": ["SSCC001"],
-        "case_serial_numbers": ["CASE001", "CASE002"],
-        "inner_case_serial_numbers": [],
-        "item_serial_numbers": ["ITEM001", "ITEM002", "ITEM003", "ITEM004", "ITEM005", "ITEM006"]
-    }
+    # For ObjectEvents, check bizStep
+    if is_object_event:
+        for child in event:
+            child_name = localname(child.tag)
+            if child_name in EVENT_TEXT_FIELDS:
+                lines.append(f"    {child_name}: {child.text}")
+                if child_name == "bizStep":
+                    biz_steps.append(child.text)
+            elif child_name == "epcList":
+                epc_count = len(list(child))
+                lines.append(f"    epcList: {epc_count} EPCs")
     
-    session.post(f"{BACKEND_URL}/serial-numbers", json=serial_data, headers={"Content-Type": "application/json"})
+    return event_type, is_object_event, lines, biz_steps
+
+def report_event_list(event_summaries):
+    """Print the EventList report from the per-event summaries"""
+    print("\n✓ EventList found")
+    print(f"  Total events: {len(event_summaries)}")
     
-    # Generate EPCIS XML
-    epcis_data = {
-        "configuration_id": config_id,
-        "read_point": "urn:epc:id:sgln:1234567.00000.0",
-        "biz_location": "urn:epc:id:sgln:1234567.00001.0"
-    }
+    for i, (event_type, _, lines, _) in enumerate(event_summaries):
+        print(f"  Event {i+1}: {event_type}")
+        for line in lines:
+            print(line)
     
-    response = session.post(f"{BACKEND_URL}/generate-epcis", json=epcis_data, headers={"Content-Type": "application/json"})
-    xml_content = response.text
+    # Check last event specifically
+    if event_summaries:
+        last_event_type, is_object_event, _, biz_steps = event_summaries[-1]
+        print(f"\n  LAST EVENT: {last_event_type}")
+        
+        if is_object_event:
+            for biz_step in biz_steps:
+                print(f"    Last event bizStep: {biz_step}")
+                if "shipping" in biz_step:
+                    print("    ✓ SHIPPING EVENT FOUND!")
+                else:
+                    print("    ❌ NOT A SHIPPING EVENT")
+        else:
+            print("    ❌ LAST EVENT IS NOT AN OBJECTEVENT")
+
+def debug_xml_step_by_step():
+    # Create configuration. The three calls below form a strict chain: the serial
+    # numbers need the new configuration id, and the EPCIS generation needs the
+    # stored serial numbers, so none of them can be overlapped
+    response = SESSION.post(f"{BACKEND_URL}/configuration", data=TEST_CONFIG_BODY, headers=JSON_HEADERS)
+    config_id = json.loads(response.content)["id"]
     
-    # Parse XML and analyze structure
+    # Create serial numbers
+    post_json(SESSION, f"{BACKEND_URL}/serial-numbers", {**TEST_SERIALS, "configuration_id": config_id})
+    
+    # Generate EPCIS XML
+    # Stream the body straight from the socket into the parser; the raw pattern
+    # checks ride along on the same reads, so the document is never buffered
+    response = post_json(SESSION, f"{BACKEND_URL}/generate-epcis", {**TEST_EPCIS_REQUEST, "configuration_id": config_id}, stream=True)
+    response.raw.decode_content = True
+    xml_stream = PatternScanningReader(response.raw)
+    
+    # Stream the XML once, handling the header and each event as soon as it is
+    # complete and then dropping it, so the whole tree is never held in memory
     try:
-        root = ET.fromstring(xml_content)
-        
         print("DETAILED XML STRUCTURE ANALYSIS:")
         print("=" * 50)
         
-        # Check EPCISHeader structure
-        for elem in root.iter():
-            if elem.tag.endswith("EPCISHeader"):
-                print("✓ EPCISHeader found")
-                for child in elem:
-                    if child.tag.endswith("extension"):
-                        print("  ✓ extension found")
-                        for grandchild in child:
-                            if grandchild.tag.endswith("EPCISMasterData"):
-                                print("    ✓ EPCISMasterData found")
-                                for ggchild in grandchild:
-                                    if ggchild.tag.endswith("VocabularyList"):
-                                        print("      ✓ VocabularyList found")
-                                        vocab_count = 0
-                                        for vocab in ggchild:
-                                            if vocab.tag.endswith("Vocabulary"):
-                                                vocab_count += 1
-                                                vocab_type = vocab.get("type")
-                                                print(f"        ✓ Vocabulary {vocab_count}: {vocab_type}")
-                                                
-                                                # Count elements in each vocabulary
-                                                for vocab_child in vocab:
-                                                    if vocab_child.tag.endswith("VocabularyElementList"):
-                                                        element_count = 0
-                                                        for elem_child in vocab_child:
-                                                            if elem_child.tag.endswith("VocabularyElement"):
-                                                                element_count += 1
-                                                                elem_id = elem_child.get("id")
-                                                                print(f"          - Element {element_count}: {elem_id}")
-                                                        print(f"          Total elements: {element_count}")
-                                        print(f"      Total vocabularies: {vocab_count}")
+        path = []  # open elements, root first
+        event_summaries = []
         
-        # Check EventList structure
-        for elem in root.iter():
-            if elem.tag.endswith("EventList"):
-                print("\n✓ EventList found")
-                events = list(elem)
-                print(f"  Total events: {len(events)}")
-                
-                for i, event in enumerate(events):
-                    event_type = event.tag.split('}')[-1] if '}' in event.tag else event.tag
-                    print(f"  Event {i+1}: {event_type}")
-                    
-                    # For ObjectEvents, check bizStep
-                    if event.tag.endswith("ObjectEvent"):
-                        for child in event:
-                            if child.tag.endswith("bizStep"):
-                                print(f"    bizStep: {child.text}")
-                            elif child.tag.endswith("action"):
-                                print(f"    action: {child.text}")
-                            elif child.tag.endswith("disposition"):
-                                print(f"    disposition: {child.text}")
-                            elif child.tag.endswith("epcList"):
-                                epc_count = len(list(child))
-                                print(f"    epcList: {epc_count} EPCs")
-                
-                # Check last event specifically
-                if events:
-                    last_event = events[-1]
-                    last_event_type = last_event.tag.split('}')[-1] if '}' in last_event.tag else last_event.tag
-                    print(f"\n  LAST EVENT: {last_event_type}")
-                    
-                    if last_event.tag.endswith("ObjectEvent"):
-                        for child in last_event:
-                            if child.tag.endswith("bizStep"):
-                                print(f"    Last event bizStep: {child.text}")
-                                if "shipping" in child.text:
-                                    print("    ✓ SHIPPING EVENT FOUND!")
-                                else:
-                                    print("    ❌ NOT A SHIPPING EVENT")
-                    else:
-                        print("    ❌ LAST EVENT IS NOT AN OBJECTEVENT")
+        for action, elem in ET.iterparse(xml_stream, events=("start", "end")):
+            if action == "start":
+                path.append(elem)
+                continue
+            path.pop()
+            parent = path[-1] if path else None
+            name = localname(elem.tag)
+            
+            if name == "EPCISHeader":
+                report_epcis_header(elem)
+                elem.clear()
+            elif parent is not None and localname(parent.tag) == "EventList":
+                event_summaries.append(summarize_event(elem))
+                # The finished event is always its parent's last child
+                del parent[-1]
+            elif name == "EventList":
+                report_event_list(event_summaries)
+                event_summaries = []
+                elem.clear()
         
         # Check for specific patterns in raw XML
         print(f"\nRAW XML PATTERN CHECKS:")
         print("=" * 30)
-        print(f"Contains 'Location' vocabulary: {'urn:epcglobal:epcis:vtype:Location' in xml_content}")
-        print(f"Contains shipping bizStep: {'urn:epcglobal:cbv:bizstep:shipping' in xml_content}")
-        print(f"Contains sender GLN: {'0345802000014' in xml_content}")
-        print(f"Contains receiver GLN: {'0567890000021' in xml_content}")
-        print(f"Contains shipper GLN: {'0999888000028' in xml_content}")
+        for label, pattern in RAW_PATTERNS.items():
+            print(f"Contains {label}: {pattern in xml_stream.found}")
         
     except ET.ParseError as e:
         print(f"XML parsing error: {str(e)}")
+    finally:
+        response.close()
 
 if __name__ == "__main__":
-    debug_xml_step_by_step()
\ No newline at end of file
+    # Collect the report and write it once rather than a syscall per line
+    report = io.StringIO()
+    try:
+        with redirect_stdout(report):
+            debug_xml_step_by_step()
+    finally:
+        sys.stdout.write(report.getvalue())
\ No newline at end of file
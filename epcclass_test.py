@@ -8,19 +8,64 @@ Tests the EPCClass functionality as requested in the review:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import xml.etree.ElementTree as ET
 from datetime import datetime
+from functools import lru_cache
 import sys
 import os
 
 # Get backend URL from environment
 BACKEND_URL = "https://c8e3fe45-251a-4359-a250-c028fb05fe98.preview.emergentagent.com/api"
 
+# Serial numbers for the 1 SSCC x 5 cases x 10 items hierarchy, built once
+CASE_SERIALS = tuple(map("CASE{:03d}".format, range(1, 6)))
+ITEM_SERIALS = tuple(map("ITEM{:03d}".format, range(1, 51)))
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def post_json(session, url, payload, **kwargs):
+    """POST a compactly encoded JSON body"""
+    return session.post(url, data=json.dumps(payload, separators=(",", ":")), headers=JSON_HEADERS, **kwargs)
+
+EPCCLASS_VOCABULARY_PATH = "{*}Vocabulary[@type='urn:epcglobal:epcis:vtype:EPCClass']"
+
+# EPCClass master-data attributes the generator must emit for the test configuration
+EXPECTED_EPCCLASS_ATTRIBUTES = {
+    "urn:epcglobal:cbv:mda#additionalTradeItemIdentification": "45802-046-85",
+    "urn:epcglobal:cbv:mda#additionalTradeItemIdentificationTypeCode": "FDA_NDC_11",
+    "urn:epcglobal:cbv:mda#regulatedProductName": "RX ECONAZOLE NITRATE 1% CRM 85G",
+    "urn:epcglobal:cbv:mda#manufacturerOfTradeItemPartyName": "Padagis LLC",
+    "urn:epcglobal:cbv:mda#dosageFormType": "CREAM",
+    "urn:epcglobal:cbv:mda#strengthDescription": "10 mg/g",
+    "urn:epcglobal:cbv:mda#netContentDescription": "85GM     Wgt"
+}
+EXPECTED_EPCCLASS_ITEMS = frozenset(EXPECTED_EPCCLASS_ATTRIBUTES.items())
+
+@lru_cache(maxsize=8)
+def parse_xml(xml_bytes):
+    """Parse an EPCIS document once and share the tree between the validators.
+
+    The validators only read the tree. Takes the raw response body so the
+    parser reads the bytes as sent, with no str round-trip first.
+    """
+    return ET.fromstring(xml_bytes)
+
 class EPCClassTester:
     def __init__(self):
         self.base_url = BACKEND_URL
         self.session = requests.Session()
+        # One pooled connection carries the whole configuration -> serials -> EPCIS
+        # chain; Retry only re-sends POSTs on connect errors, never after a response
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.test_results = []
         
     def log_test(self, test_name, success, message, details=None):
@@ -60,11 +105,7 @@ class EPCClassTester:
         }
         
         try:
-            response = self.session.post(
-                f"{self.base_url}/configuration",
-                json=test_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = post_json(self.session, f"{self.base_url}/configuration", test_data)
             
             if response.status_code == 200:
                 data = response.json()
@@ -117,17 +158,13 @@ class EPCClassTester:
         serial_data = {
             "configuration_id": config_id,
             "sscc_serial_numbers": ["SSCC001"],
-            "case_serial_numbers": [f"CASE{i+1:03d}" for i in range(5)],  # 5 cases
-            "item_serial_numbers": [f"ITEM{i+1:03d}" for i in range(50)]  # 50 items (10 per case × 5 cases)
+            "case_serial_numbers": CASE_SERIALS,  # 5 cases
+            "item_serial_numbers": ITEM_SERIALS  # 50 items (10 per case × 5 cases)
         }
         
         try:
             # Create serial numbers first
-            serial_response = self.session.post(
-                f"{self.base_url}/serial-numbers",
-                json=serial_data,
-                headers={"Content-Type": "application/json"}
-            )
+            serial_response = post_json(self.session, f"{self.base_url}/serial-numbers", serial_data)
             
             if serial_response.status_code != 200:
                 self.log_test("EPCIS XML with EPCISMasterData", False, 
@@ -141,21 +178,17 @@ class EPCClassTester:
                 "biz_location": "urn:epc:id:sgln:1234567.00001.0"
             }
             
-            response = self.session.post(
-                f"{self.base_url}/generate-epcis",
-                json=epcis_data,
-                headers={"Content-Type": "application/json"}
-            )
+            response = post_json(self.session, f"{self.base_url}/generate-epcis", epcis_data)
             
             if response.status_code == 200:
-                xml_content = response.text
+                xml_bytes = response.content
                 
                 # Validate EPCISMasterData structure
-                if self.validate_epcismasterdata_structure(xml_content):
+                if self.validate_epcismasterdata_structure(xml_bytes):
                     self.log_test("EPCIS XML with EPCISMasterData", True, 
                                 "EPCIS XML includes proper EPCISMasterData with EPCClass vocabulary",
-                                f"XML length: {len(xml_content)} characters")
-                    return xml_content
+                                f"XML length: {len(xml_bytes)} bytes")
+                    return xml_bytes
                 else:
                     self.log_test("EPCIS XML with EPCISMasterData", False, 
                                 "EPCISMasterData structure validation failed")
@@ -169,75 +202,38 @@ class EPCClassTester:
             self.log_test("EPCIS XML with EPCISMasterData", False, f"Request error: {str(e)}")
             return None
     
-    def validate_epcismasterdata_structure(self, xml_content):
+    def validate_epcismasterdata_structure(self, xml_bytes):
         """Validate EPCISMasterData structure with EPCClass vocabulary"""
         try:
-            root = ET.fromstring(xml_content)
-            
-            # Find EPCISHeader
-            epcis_header = None
-            for child in root:
-                if child.tag.endswith("EPCISHeader"):
-                    epcis_header = child
-                    break
+            root = parse_xml(xml_bytes)
             
+            # Each step is one find() over direct children; {*} matches any namespace
+            epcis_header = root.find("{*}EPCISHeader")
             if epcis_header is None:
                 print("   Missing EPCISHeader element")
                 return False
             
-            # Find EPCISMasterData
-            epcis_master_data = None
-            for child in epcis_header:
-                if child.tag.endswith("EPCISMasterData"):
-                    epcis_master_data = child
-                    break
-            
+            epcis_master_data = epcis_header.find("{*}EPCISMasterData")
             if epcis_master_data is None:
                 print("   Missing EPCISMasterData element")
                 return False
             
-            # Find VocabularyList
-            vocabulary_list = None
-            for child in epcis_master_data:
-                if child.tag.endswith("VocabularyList"):
-                    vocabulary_list = child
-                    break
-            
+            vocabulary_list = epcis_master_data.find("{*}VocabularyList")
             if vocabulary_list is None:
                 print("   Missing VocabularyList element")
                 return False
             
-            # Find EPCClass Vocabulary
-            epcclass_vocabulary = None
-            for child in vocabulary_list:
-                if child.tag.endswith("Vocabulary"):
-                    vocab_type = child.get("type")
-                    if vocab_type == "urn:epcglobal:epcis:vtype:EPCClass":
-                        epcclass_vocabulary = child
-                        break
-            
+            epcclass_vocabulary = vocabulary_list.find(EPCCLASS_VOCABULARY_PATH)
             if epcclass_vocabulary is None:
                 print("   Missing EPCClass Vocabulary element")
                 return False
             
-            # Find VocabularyElementList
-            vocabulary_element_list = None
-            for child in epcclass_vocabulary:
-                if child.tag.endswith("VocabularyElementList"):
-                    vocabulary_element_list = child
-                    break
-            
+            vocabulary_element_list = epcclass_vocabulary.find("{*}VocabularyElementList")
             if vocabulary_element_list is None:
                 print("   Missing VocabularyElementList element")
                 return False
             
-            # Find VocabularyElement
-            vocabulary_element = None
-            for child in vocabulary_element_list:
-                if child.tag.endswith("VocabularyElement"):
-                    vocabulary_element = child
-                    break
-            
+            vocabulary_element = vocabulary_element_list.find("{*}VocabularyElement")
             if vocabulary_element is None:
                 print("   Missing VocabularyElement element")
                 return False
@@ -250,43 +246,33 @@ class EPCClassTester:
                 return False
             
             # Validate EPCClass attributes
-            expected_attributes = {
-                "urn:epcglobal:cbv:mda#additionalTradeItemIdentification": "45802-046-85",
-                "urn:epcglobal:cbv:mda#additionalTradeItemIdentificationTypeCode": "FDA_NDC_11",
-                "urn:epcglobal:cbv:mda#regulatedProductName": "RX ECONAZOLE NITRATE 1% CRM 85G",
-                "urn:epcglobal:cbv:mda#manufacturerOfTradeItemPartyName": "Padagis LLC",
-                "urn:epcglobal:cbv:mda#dosageFormType": "CREAM",
-                "urn:epcglobal:cbv:mda#strengthDescription": "10 mg/g",
-                "urn:epcglobal:cbv:mda#netContentDescription": "85GM     Wgt"
+            found_attributes = {
+                attribute.get("id"): attribute.text
+                for attribute in vocabulary_element.iterfind("{*}attribute")
             }
             
-            found_attributes = {}
-            for child in vocabulary_element:
-                if child.tag.endswith("attribute"):
-                    attr_id = child.get("id")
-                    attr_value = child.text
-                    found_attributes[attr_id] = attr_value
-            
-            missing_attributes = []
-            incorrect_values = []
-            
-            for expected_id, expected_value in expected_attributes.items():
-                if expected_id not in found_attributes:
-                    missing_attributes.append(expected_id)
-                elif found_attributes[expected_id] != expected_value:
-                    incorrect_values.append(f"{expected_id}: expected '{expected_value}', got '{found_attributes[expected_id]}'")
-            
-            if missing_attributes:
-                print(f"   Missing EPCClass attributes: {missing_attributes}")
-                return False
-            
-            if incorrect_values:
+            # One set difference decides pass/fail; the per-attribute diff
+            # below only runs to report a mismatch
+            if EXPECTED_EPCCLASS_ITEMS - found_attributes.items():
+                missing_attributes = []
+                incorrect_values = []
+                
+                for expected_id, expected_value in EXPECTED_EPCCLASS_ATTRIBUTES.items():
+                    if expected_id not in found_attributes:
+                        missing_attributes.append(expected_id)
+                    elif found_attributes[expected_id] != expected_value:
+                        incorrect_values.append(f"{expected_id}: expected '{expected_value}', got '{found_attributes[expected_id]}'")
+                
+                if missing_attributes:
+                    print(f"   Missing EPCClass attributes: {missing_attributes}")
+                    return False
+                
                 print(f"   Incorrect EPCClass attribute values: {incorrect_values}")
                 return False
             
             print("   ✓ EPCISMasterData structure is valid")
             print("   ✓ EPCClass vocabulary element found with correct ID pattern")
-            print(f"   ✓ All {len(expected_attributes)} EPCClass attributes present with correct values")
+            print(f"   ✓ All {len(EXPECTED_EPCCLASS_ATTRIBUTES)} EPCClass attributes present with correct values")
             return True
             
         except ET.ParseError as e:
@@ -309,13 +295,13 @@ class EPCClassTester:
             return False
         
         # Step 2: Generate EPCIS XML with EPCISMasterData
-        xml_content = self.test_epcis_xml_with_epcismasterdata(config_id)
-        if not xml_content:
+        xml_bytes = self.test_epcis_xml_with_epcismasterdata(config_id)
+        if not xml_bytes:
             self.log_test("Complete Workflow", False, "Failed at EPCIS XML generation step")
             return False
         
         # Step 3: Validate complete XML structure
-        if self.validate_complete_xml_structure(xml_content):
+        if self.validate_complete_xml_structure(xml_bytes):
             self.log_test("Complete Workflow", True, 
                         "Complete workflow successful: Configuration → Serial Numbers → EPCIS XML with EPCClass data")
             return True
@@ -323,34 +309,21 @@ class EPCClassTester:
             self.log_test("Complete Workflow", False, "Complete XML structure validation failed")
             return False
     
-    def validate_complete_xml_structure(self, xml_content):
+    def validate_complete_xml_structure(self, xml_bytes):
         """Validate that XML contains both EPCISMasterData and event data"""
         try:
-            root = ET.fromstring(xml_content)
+            root = parse_xml(xml_bytes)
             
             # Check for EPCISMasterData
-            has_master_data = False
-            has_event_data = False
-            
-            for child in root:
-                if child.tag.endswith("EPCISHeader"):
-                    for header_child in child:
-                        if header_child.tag.endswith("EPCISMasterData"):
-                            has_master_data = True
-                            break
-                elif child.tag.endswith("EPCISBody"):
-                    for body_child in child:
-                        if body_child.tag.endswith("EventList"):
-                            # Check if EventList has events
-                            event_count = len(list(body_child))
-                            if event_count > 0:
-                                has_event_data = True
-                            break
-            
+            has_master_data = root.find("{*}EPCISHeader/{*}EPCISMasterData") is not None
             if not has_master_data:
                 print("   Missing EPCISMasterData in complete XML")
                 return False
             
+            # Check if EventList has events; len() on an Element counts its
+            # children without building a list of them
+            event_list = root.find("{*}EPCISBody/{*}EventList")
+            has_event_data = event_list is not None and len(event_list) > 0
             if not has_event_data:
                 print("   Missing event data in EPCISBody")
                 return False
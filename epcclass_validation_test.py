@@ -5,11 +5,35 @@ Validates that the EPCISMasterData structure matches the GS1 standard
 """
 
 import requests
+import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import xml.etree.ElementTree as ET
 from datetime import datetime
 
 BACKEND_URL = "https://c8e3fe45-251a-4359-a250-c028fb05fe98.preview.emergentagent.com/api"
 
+# One pooled connection carries the whole configuration -> serials -> EPCIS
+# chain; Retry only re-sends POSTs on connect errors, never after a response
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Serial numbers for the 1 SSCC x 5 cases x 10 items hierarchy, built once
+CASE_SERIALS = tuple(map("CASE{:03d}".format, range(1, 6)))
+ITEM_SERIALS = tuple(map("ITEM{:03d}".format, range(1, 51)))
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def post_json(session, url, payload, **kwargs):
+    """POST a compactly encoded JSON body"""
+    return session.post(url, data=json.dumps(payload, separators=(",", ":")), headers=JSON_HEADERS, **kwargs)
+
 def test_epcclass_xml_structure():
     """Test EPCClass XML structure against GS1 standard"""
     
@@ -32,10 +56,8 @@ def test_epcclass_xml_structure():
         "net_content_description": "85GM     Wgt"
     }
     
-    session = requests.Session()
-    
     # Create configuration
-    config_response = session.post(f"{BACKEND_URL}/configuration", json=config_data)
+    config_response = post_json(SESSION, f"{BACKEND_URL}/configuration", config_data)
     if config_response.status_code != 200:
         print(f"❌ Failed to create configuration: {config_response.status_code}")
         return False
@@ -46,11 +68,11 @@ def test_epcclass_xml_structure():
     serial_data = {
         "configuration_id": config_id,
         "sscc_serial_numbers": ["SSCC001"],
-        "case_serial_numbers": [f"CASE{i+1:03d}" for i in range(5)],
-        "item_serial_numbers": [f"ITEM{i+1:03d}" for i in range(50)]
+        "case_serial_numbers": CASE_SERIALS,
+        "item_serial_numbers": ITEM_SERIALS
     }
     
-    serial_response = session.post(f"{BACKEND_URL}/serial-numbers", json=serial_data)
+    serial_response = post_json(SESSION, f"{BACKEND_URL}/serial-numbers", serial_data)
     if serial_response.status_code != 200:
         print(f"❌ Failed to create serial numbers: {serial_response.status_code}")
         return False
@@ -62,176 +84,65 @@ def test_epcclass_xml_structure():
         "biz_location": "urn:epc:id:sgln:1234567.00001.0"
     }
     
-    epcis_response = session.post(f"{BACKEND_URL}/generate-epcis", json=epcis_data)
+    # Streamed: the body is parsed straight off the socket and each event is
+    # dropped once counted, so only the header subtree is ever held in memory
+    epcis_response = post_json(SESSION, f"{BACKEND_URL}/generate-epcis", epcis_data, stream=True)
     if epcis_response.status_code != 200:
         print(f"❌ Failed to generate EPCIS XML: {epcis_response.status_code}")
+        epcis_response.close()
         return False
-    
-    xml_content = epcis_response.text
+    epcis_response.raw.decode_content = True
     
     # Parse and validate XML structure
     try:
-        root = ET.fromstring(xml_content)
-        
-        print("🔍 Validating EPCClass XML Structure against GS1 Standard...")
-        print("=" * 70)
-        
-        # 1. Validate root element
-        if not root.tag.endswith("EPCISDocument"):
-            print(f"❌ Invalid root element: {root.tag}")
-            return False
-        print("✅ Root element: EPCISDocument")
-        
-        # 2. Validate EPCIS namespace
-        if not root.tag.startswith("{urn:epcglobal:epcis:xsd:1}"):
-            print(f"❌ Invalid EPCIS namespace: {root.tag}")
-            return False
-        print("✅ EPCIS namespace: urn:epcglobal:epcis:xsd:1")
-        
-        # 3. Validate schema version
-        schema_version = root.get("schemaVersion")
-        if schema_version != "1.2":
-            print(f"❌ Invalid schema version: {schema_version}")
-            return False
-        print(f"✅ Schema version: {schema_version}")
+        path = []  # open elements, root first
+        header_valid = None  # None until the first EPCISHeader closes
+        epcis_body = None
+        event_list = None
+        event_count = 0
         
-        # 4. Find EPCISHeader
-        epcis_header = None
-        for child in root:
-            if child.tag.endswith("EPCISHeader"):
-                epcis_header = child
-                break
+        for action, elem in ET.iterparse(epcis_response.raw, events=("start", "end")):
+            if action == "start":
+                if not path:
+                    if not validate_epcis_root(elem):
+                        return False
+                elif len(path) == 1:
+                    if epcis_body is None and elem.tag.endswith("EPCISBody"):
+                        epcis_body = elem
+                elif path[-1] is epcis_body and event_list is None and elem.tag.endswith("EventList"):
+                    event_list = elem
+                path.append(elem)
+                continue
+            path.pop()
+            parent = path[-1] if path else None
+            
+            # 4. Find EPCISHeader
+            if len(path) == 1 and header_valid is None and elem.tag.endswith("EPCISHeader"):
+                print("✅ EPCISHeader found")
+                header_valid = validate_epcclass_header(elem)
+                if not header_valid:
+                    return False
+                elem.clear()
+            elif parent is not None and parent is event_list:
+                # Count the event, then drop it; it is always the list's last child
+                event_count += 1
+                del parent[-1]
         
-        if epcis_header is None:
+        if header_valid is None:
             print("❌ Missing EPCISHeader")
             return False
-        print("✅ EPCISHeader found")
-        
-        # 5. Find EPCISMasterData
-        epcis_master_data = None
-        for child in epcis_header:
-            if child.tag.endswith("EPCISMasterData"):
-                epcis_master_data = child
-                break
-        
-        if epcis_master_data is None:
-            print("❌ Missing EPCISMasterData")
-            return False
-        print("✅ EPCISMasterData found")
-        
-        # 6. Find VocabularyList
-        vocabulary_list = None
-        for child in epcis_master_data:
-            if child.tag.endswith("VocabularyList"):
-                vocabulary_list = child
-                break
-        
-        if vocabulary_list is None:
-            print("❌ Missing VocabularyList")
-            return False
-        print("✅ VocabularyList found")
-        
-        # 7. Find EPCClass Vocabulary
-        epcclass_vocabulary = None
-        for child in vocabulary_list:
-            if child.tag.endswith("Vocabulary"):
-                vocab_type = child.get("type")
-                if vocab_type == "urn:epcglobal:epcis:vtype:EPCClass":
-                    epcclass_vocabulary = child
-                    break
-        
-        if epcclass_vocabulary is None:
-            print("❌ Missing EPCClass Vocabulary")
-            return False
-        print("✅ EPCClass Vocabulary found")
-        print(f"   Type: {epcclass_vocabulary.get('type')}")
-        
-        # 8. Find VocabularyElementList
-        vocabulary_element_list = None
-        for child in epcclass_vocabulary:
-            if child.tag.endswith("VocabularyElementList"):
-                vocabulary_element_list = child
-                break
-        
-        if vocabulary_element_list is None:
-            print("❌ Missing VocabularyElementList")
-            return False
-        print("✅ VocabularyElementList found")
-        
-        # 9. Find VocabularyElement
-        vocabulary_element = None
-        for child in vocabulary_element_list:
-            if child.tag.endswith("VocabularyElement"):
-                vocabulary_element = child
-                break
-        
-        if vocabulary_element is None:
-            print("❌ Missing VocabularyElement")
-            return False
-        
-        element_id = vocabulary_element.get("id")
-        print(f"✅ VocabularyElement found")
-        print(f"   ID: {element_id}")
-        
-        # 10. Validate EPCClass attributes
-        expected_attributes = {
-            "urn:epcglobal:cbv:mda#additionalTradeItemIdentification": "45802-046-85",
-            "urn:epcglobal:cbv:mda#additionalTradeItemIdentificationTypeCode": "FDA_NDC_11",
-            "urn:epcglobal:cbv:mda#regulatedProductName": "RX ECONAZOLE NITRATE 1% CRM 85G",
-            "urn:epcglobal:cbv:mda#manufacturerOfTradeItemPartyName": "Padagis LLC",
-            "urn:epcglobal:cbv:mda#dosageFormType": "CREAM",
-            "urn:epcglobal:cbv:mda#strengthDescription": "10 mg/g",
-            "urn:epcglobal:cbv:mda#netContentDescription": "85GM     Wgt"
-        }
-        
-        found_attributes = {}
-        for child in vocabulary_element:
-            if child.tag.endswith("attribute"):
-                attr_id = child.get("id")
-                attr_value = child.text
-                found_attributes[attr_id] = attr_value
-        
-        print(f"✅ Found {len(found_attributes)} EPCClass attributes:")
-        
-        all_attributes_valid = True
-        for expected_id, expected_value in expected_attributes.items():
-            if expected_id in found_attributes:
-                if found_attributes[expected_id] == expected_value:
-                    print(f"   ✅ {expected_id.split('#')[1]}: {expected_value}")
-                else:
-                    print(f"   ❌ {expected_id.split('#')[1]}: expected '{expected_value}', got '{found_attributes[expected_id]}'")
-                    all_attributes_valid = False
-            else:
-                print(f"   ❌ Missing attribute: {expected_id.split('#')[1]}")
-                all_attributes_valid = False
-        
-        if not all_attributes_valid:
-            return False
         
         # 11. Validate EPCISBody exists
-        epcis_body = None
-        for child in root:
-            if child.tag.endswith("EPCISBody"):
-                epcis_body = child
-                break
-        
         if epcis_body is None:
             print("❌ Missing EPCISBody")
             return False
         print("✅ EPCISBody found")
         
         # 12. Validate EventList exists
-        event_list = None
-        for child in epcis_body:
-            if child.tag.endswith("EventList"):
-                event_list = child
-                break
-        
         if event_list is None:
             print("❌ Missing EventList")
             return False
         
-        event_count = len(list(event_list))
         print(f"✅ EventList found with {event_count} events")
         
         print("=" * 70)
@@ -251,6 +162,135 @@ def test_epcclass_xml_structure():
     except Exception as e:
         print(f"❌ Validation error: {str(e)}")
         return False
+    finally:
+        epcis_response.close()
+
+def validate_epcis_root(root):
+    """Check the EPCISDocument root as soon as its start tag is parsed"""
+    print("🔍 Validating EPCClass XML Structure against GS1 Standard...")
+    print("=" * 70)
+    
+    # 1. Validate root element
+    if not root.tag.endswith("EPCISDocument"):
+        print(f"❌ Invalid root element: {root.tag}")
+        return False
+    print("✅ Root element: EPCISDocument")
+    
+    # 2. Validate EPCIS namespace
+    if not root.tag.startswith("{urn:epcglobal:epcis:xsd:1}"):
+        print(f"❌ Invalid EPCIS namespace: {root.tag}")
+        return False
+    print("✅ EPCIS namespace: urn:epcglobal:epcis:xsd:1")
+    
+    # 3. Validate schema version
+    schema_version = root.get("schemaVersion")
+    if schema_version != "1.2":
+        print(f"❌ Invalid schema version: {schema_version}")
+        return False
+    print(f"✅ Schema version: {schema_version}")
+    return True
+
+def validate_epcclass_header(epcis_header):
+    """Validate the EPCClass master data inside a fully parsed EPCISHeader"""
+    # 5. Find EPCISMasterData
+    epcis_master_data = None
+    for child in epcis_header:
+        if child.tag.endswith("EPCISMasterData"):
+            epcis_master_data = child
+            break
+    
+    if epcis_master_data is None:
+        print("❌ Missing EPCISMasterData")
+        return False
+    print("✅ EPCISMasterData found")
+    
+    # 6. Find VocabularyList
+    vocabulary_list = None
+    for child in epcis_master_data:
+        if child.tag.endswith("VocabularyList"):
+            vocabulary_list = child
+            break
+    
+    if vocabulary_list is None:
+        print("❌ Missing VocabularyList")
+        return False
+    print("✅ VocabularyList found")
+    
+    # 7. Find EPCClass Vocabulary
+    epcclass_vocabulary = None
+    for child in vocabulary_list:
+        if child.tag.endswith("Vocabulary"):
+            vocab_type = child.get("type")
+            if vocab_type == "urn:epcglobal:epcis:vtype:EPCClass":
+                epcclass_vocabulary = child
+                break
+    
+    if epcclass_vocabulary is None:
+        print("❌ Missing EPCClass Vocabulary")
+        return False
+    print("✅ EPCClass Vocabulary found")
+    print(f"   Type: {epcclass_vocabulary.get('type')}")
+    
+    # 8. Find VocabularyElementList
+    vocabulary_element_list = None
+    for child in epcclass_vocabulary:
+        if child.tag.endswith("VocabularyElementList"):
+            vocabulary_element_list = child
+            break
+    
+    if vocabulary_element_list is None:
+        print("❌ Missing VocabularyElementList")
+        return False
+    print("✅ VocabularyElementList found")
+    
+    # 9. Find VocabularyElement
+    vocabulary_element = None
+    for child in vocabulary_element_list:
+        if child.tag.endswith("VocabularyElement"):
+            vocabulary_element = child
+            break
+    
+    if vocabulary_element is None:
+        print("❌ Missing VocabularyElement")
+        return False
+    
+    element_id = vocabulary_element.get("id")
+    print(f"✅ VocabularyElement found")
+    print(f"   ID: {element_id}")
+    
+    # 10. Validate EPCClass attributes
+    expected_attributes = {
+        "urn:epcglobal:cbv:mda#additionalTradeItemIdentification": "45802-046-85",
+        "urn:epcglobal:cbv:mda#additionalTradeItemIdentificationTypeCode": "FDA_NDC_11",
+        "urn:epcglobal:cbv:mda#regulatedProductName": "RX ECONAZOLE NITRATE 1% CRM 85G",
+        "urn:epcglobal:cbv:mda#manufacturerOfTradeItemPartyName": "Padagis LLC",
+        "urn:epcglobal:cbv:mda#dosageFormType": "CREAM",
+        "urn:epcglobal:cbv:mda#strengthDescription": "10 mg/g",
+        "urn:epcglobal:cbv:mda#netContentDescription": "85GM     Wgt"
+    }
+    
+    found_attributes = {}
+    for child in vocabulary_element:
+        if child.tag.endswith("attribute"):
+            attr_id = child.get("id")
+            attr_value = child.text
+            found_attributes[attr_id] = attr_value
+    
+    print(f"✅ Found {len(found_attributes)} EPCClass attributes:")
+    
+    all_attributes_valid = True
+    for expected_id, expected_value in expected_attributes.items():
+        if expected_id in found_attributes:
+            if found_attributes[expected_id] == expected_value:
+                print(f"   ✅ {expected_id.split('#')[1]}: {expected_value}")
+            else:
+                print(f"   ❌ {expected_id.split('#')[1]}: expected '{expected_value}', got '{found_attributes[expected_id]}'")
+                all_attributes_valid = False
+        else:
+            print(f"   ❌ Missing attribute: {expected_id.split('#')[1]}")
+            all_attributes_valid = False
+    
+    return all_attributes_valid
 
 if __name__ == "__main__":
     success = test_epcclass_xml_structure()